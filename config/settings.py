@@ -127,6 +127,23 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20
 }
 
+# Monte Carlo uncertainty propagation
+UNCERTAINTY_MAX_DRAWS = config('UNCERTAINTY_MAX_DRAWS', default=100000, cast=int)
+UNCERTAINTY_MAX_BATCH = config('UNCERTAINTY_MAX_BATCH', default=100, cast=int)
+# Upper bound on samples x draws per batch request, which sets its CPU time
+UNCERTAINTY_MAX_TOTAL_DRAWS = config('UNCERTAINTY_MAX_TOTAL_DRAWS', default=1000000, cast=int)
+UNCERTAINTY_MEMORY_BUDGET = config('UNCERTAINTY_MEMORY_BUDGET', default=64 * 1024 * 1024, cast=int)
+
+# Overrides for the USEPA exposure parameters in water_quality.health_risk,
+# e.g. {'adult': {'body_weight': 60}, 'lifetime_years': 70}
+HEALTH_RISK_EXPOSURE = {}
+
+# Allow webhook URLs on private/loopback addresses (only for local testing with webhook_stub)
+WEBHOOK_ALLOW_PRIVATE_TARGETS = config('WEBHOOK_ALLOW_PRIVATE_TARGETS', default=False, cast=bool)
+
+# How long each process may reuse its compiled alert rules before reloading them
+ALERT_RULES_CACHE_SECONDS = config('ALERT_RULES_CACHE_SECONDS', default=30, cast=int)
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOWED_ORIGINS = [
@@ -1,12 +1,90 @@
-from django.contrib import admin
-from .models import WaterQualitySample
+import tempfile
+import zipfile
+from django.contrib import admin, messages
+from django.db import transaction
+from django.http import FileResponse
+from .models import WaterQualitySample, SampleChange, WebhookEndpoint, AlertRule, Alert, SampleArchive
+from .changes import latest_change_seq, record_change, record_changes
+from .indices import recompute_indices
+from .pagination import EstimatedCountPaginator
+from .pdf_generator import WaterQualityPDFGenerator
+from .serializers import WaterQualityReportSerializer
+
+ADMIN_BATCH_SIZE = 500
+
+
+class IndexRangeFilter(admin.SimpleListFilter):
+    """
+    Sidebar filter with fixed classification buckets for a continuous index,
+    instead of one choice per distinct stored value.
+    """
+    field_name = None
+    # (value, label, lower bound inclusive, upper bound exclusive)
+    buckets = ()
+
+    def lookups(self, request, model_admin):
+        return [(value, label) for value, label, lower, upper in self.buckets]
+
+    def queryset(self, request, queryset):
+        for value, label, lower, upper in self.buckets:
+            if self.value() != value:
+                continue
+            filters = {}
+            if lower is not None:
+                filters[f'{self.field_name}__gte'] = lower
+            if upper is not None:
+                filters[f'{self.field_name}__lt'] = upper
+            return queryset.filter(**filters)
+        return queryset
+
+
+class HMPIRangeFilter(IndexRangeFilter):
+    title = 'HMPI'
+    parameter_name = 'hmpi_range'
+    field_name = 'hmpi'
+    buckets = (
+        ('low', '< 100 (Low)', None, 100),
+        ('medium', '100-200 (Medium)', 100, 200),
+        ('high', '> 200 (High)', 200, None),
+    )
+
+
+class HPIRangeFilter(IndexRangeFilter):
+    title = 'HPI'
+    parameter_name = 'hpi_range'
+    field_name = 'hpi'
+    buckets = (
+        ('acceptable', '< 100 (Acceptable)', None, 100),
+        ('slight', '100-300 (Slightly affected)', 100, 300),
+        ('high', '> 300 (Highly affected)', 300, None),
+    )
+
+
+class PLIRangeFilter(IndexRangeFilter):
+    title = 'PLI'
+    parameter_name = 'pli_range'
+    field_name = 'pli'
+    buckets = (
+        ('unpolluted', '< 1 (No pollution)', None, 1),
+        ('polluted', '>= 1 (Polluted)', 1, None),
+    )
+
 
 @admin.register(WaterQualitySample)
 class WaterQualitySampleAdmin(admin.ModelAdmin):
     list_display = ['sample_id', 'sampling_date', 'latitude', 'longitude', 'hmpi', 'hpi', 'pli']
-    list_filter = ['sampling_date', 'hmpi', 'hpi']
-    search_fields = ['sample_id']
-    readonly_fields = ['hmpi', 'hpi', 'hei', 'hci', 'cd', 'pi', 'pli', 'created_at', 'updated_at']
+    list_filter = ['sampling_date', HMPIRangeFilter, HPIRangeFilter, PLIRangeFilter]
+    # Case-sensitive prefix match so the sample_id index can be used
+    search_fields = ['sample_id__startswith']
+    search_help_text = "Search by sample ID prefix"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['recompute_selected_indices', 'export_selected_pdfs']
+    readonly_fields = [
+        'hmpi', 'hpi', 'hei', 'hci', 'cd', 'pi', 'pli',
+        'hi_adult', 'hi_child', 'cr_adult', 'cr_child', 'health_risk',
+        'created_at', 'updated_at'
+    ]
     
     fieldsets = (
         ('Basic Information', {
@@ -20,11 +98,118 @@ class WaterQualitySampleAdmin(admin.ModelAdmin):
             'fields': ('hmpi', 'hpi', 'hei', 'hci', 'cd', 'pi', 'pli'),
             'classes': ('collapse',)
         }),
+        ('Health Risk (USEPA)', {
+            'fields': ('hi_adult', 'hi_child', 'cr_adult', 'cr_child', 'health_risk'),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            record_change(obj, 'update' if change else 'create')
+    
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            record_change(obj, 'delete')
+            super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            record_changes(queryset, 'delete')
+            super().delete_queryset(request, queryset)
+    
+    @admin.action(description="Recompute indices and health risk for selected samples")
+    def recompute_selected_indices(self, request, queryset):
+        updated = recompute_indices(queryset, batch_size=ADMIN_BATCH_SIZE)
+        self.message_user(request, f"Recomputed indices for {updated} samples.", messages.SUCCESS)
+    
+    @admin.action(description="Export PDF reports for selected samples (zip)")
+    def export_selected_pdfs(self, request, queryset):
+        pdf_generator = WaterQualityPDFGenerator()
+        archive_file = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+        
+        with zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for sample in queryset.order_by().iterator(chunk_size=ADMIN_BATCH_SIZE):
+                report_data = WaterQualityReportSerializer(sample).data
+                pdf_buffer = pdf_generator.generate_report(report_data)
+                archive.writestr(f"water_quality_report_{sample.sample_id}.pdf", pdf_buffer.getvalue())
+        
+        archive_file.seek(0)
+        return FileResponse(archive_file, as_attachment=True, filename='water_quality_reports.zip')
+
+
+@admin.register(SampleChange)
+class SampleChangeAdmin(admin.ModelAdmin):
+    list_display = ['seq', 'sample_id', 'action', 'created_at']
+    list_filter = ['action']
+    search_fields = ['sample_id__startswith']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    # The change log is append-only
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ['url', 'is_active', 'last_seq', 'failure_count', 'next_attempt_at']
+    list_filter = ['is_active']
+    readonly_fields = ['last_seq', 'failure_count', 'next_attempt_at', 'last_error', 'created_at', 'updated_at']
+    
+    def save_model(self, request, obj, form, change):
+        # New endpoints receive changes from now on, not the whole history
+        if not change:
+            obj.last_seq = latest_change_seq()
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(AlertRule)
+class AlertRuleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'field', 'operator', 'threshold', 'dedup_window_hours', 'is_active']
+    list_filter = ['is_active', 'field']
+    search_fields = ['name']
+
+
+@admin.register(Alert)
+class AlertAdmin(admin.ModelAdmin):
+    list_display = ['rule', 'well_key', 'sample_id', 'value', 'occurrences', 'first_triggered_at', 'last_triggered_at']
+    list_filter = ['rule']
+    list_select_related = ['rule']
+    search_fields = ['sample_id__startswith', 'well_key__startswith']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ['rule', 'sample_id', 'well_key', 'value', 'occurrences', 'first_triggered_at', 'last_triggered_at']
+
+
+@admin.register(SampleArchive)
+class SampleArchiveAdmin(admin.ModelAdmin):
+    list_display = ['year', 'sample_count', 'first_sampling_date', 'last_sampling_date', 'created_at']
+    list_filter = ['year']
+    exclude = ['payload']
+    readonly_fields = ['year', 'sample_count', 'first_sampling_date', 'last_sampling_date', 'summary', 'created_at']
+    
+    # Archives are written by the archive_samples command only. Deleting one
+    # would lose its samples and free their sample_ids, so that is blocked too
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 # Example API Usage
 """
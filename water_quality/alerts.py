@@ -0,0 +1,162 @@
+import operator
+import threading
+import time
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .indices import METAL_FIELDS, INDEX_FIELDS
+from .models import AlertRule, Alert
+
+ALERT_FIELDS = METAL_FIELDS + INDEX_FIELDS
+
+OPERATORS = {
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+
+_lock = threading.Lock()
+_compiled = None
+_compiled_at = 0.0
+
+
+def well_key(latitude, longitude):
+    """Samples from the same well share a location; 4 decimals is roughly 10 m"""
+    return f"{latitude:.4f},{longitude:.4f}"
+
+
+class CompiledRules:
+    """
+    Active alert rules compiled into column indices and threshold arrays so a
+    batch of samples is evaluated with one NumPy comparison per operator.
+    """
+    
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.columns = np.array([ALERT_FIELDS.index(rule.field) for rule in self.rules], dtype=int)
+        self.thresholds = np.array([rule.threshold for rule in self.rules], dtype=float)
+        operators = np.array([rule.operator for rule in self.rules])
+        self.operator_masks = [
+            (OPERATORS[code], operators == code) for code in OPERATORS if (operators == code).any()
+        ]
+    
+    def __bool__(self):
+        return bool(self.rules)
+    
+    def evaluate(self, values):
+        """
+        `values` is an (n_samples, len(ALERT_FIELDS)) array; missing values
+        are NaN and never match. Returns an (n_samples, n_rules) bool array.
+        """
+        selected = values[:, self.columns]
+        matches = np.zeros(selected.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for compare, mask in self.operator_masks:
+                matches[:, mask] = compare(selected[:, mask], self.thresholds[mask])
+        return matches
+
+
+def get_compiled_rules():
+    """
+    Compiled active rules, cached per process. Rule saves and deletes in this
+    process invalidate the cache once committed; changes made elsewhere are
+    picked up after ALERT_RULES_CACHE_SECONDS. evaluate_alerts re-checks
+    matched rules against the database, so a stale cache never writes alerts
+    for deleted or deactivated rules.
+    """
+    global _compiled, _compiled_at
+    with _lock:
+        if _compiled is None or time.monotonic() - _compiled_at > settings.ALERT_RULES_CACHE_SECONDS:
+            _compiled = CompiledRules(AlertRule.objects.filter(is_active=True))
+            _compiled_at = time.monotonic()
+        return _compiled
+
+
+def invalidate_alert_rules():
+    global _compiled
+    with _lock:
+        _compiled = None
+
+
+@receiver(post_save, sender=AlertRule)
+@receiver(post_delete, sender=AlertRule)
+def _alert_rule_changed(sender, **kwargs):
+    # After commit, so a concurrent request cannot recompile from the old rows
+    transaction.on_commit(invalidate_alert_rules)
+
+
+def evaluate_alerts(samples):
+    """
+    Evaluate the active rules against freshly written samples and record
+    matches. A match for a rule and well that already has an alert opened
+    within the rule's dedup window increments that alert instead of creating
+    a new one. Call inside the transaction that writes the samples, before
+    recording their changes, so the change log lock is held only briefly.
+    Returns the number of matches.
+    """
+    compiled = get_compiled_rules()
+    if not compiled or not samples:
+        return 0
+    
+    values = np.array(
+        [[np.nan if getattr(sample, field) is None else getattr(sample, field) for field in ALERT_FIELDS]
+         for sample in samples],
+        dtype=float
+    ).reshape(len(samples), len(ALERT_FIELDS))
+    sample_rows, rule_columns = np.nonzero(compiled.evaluate(values))
+    if not len(sample_rows):
+        return 0
+    
+    now = timezone.now()
+    matches = [
+        (compiled.rules[column], samples[row], float(values[row, compiled.columns[column]]))
+        for row, column in zip(sample_rows, rule_columns)
+    ]
+    
+    # The compiled rules may be stale (queryset deletes or edits in another
+    # process); only write alerts for rules that still exist and are active
+    rules = {rule.pk: rule for rule, sample, value in matches}
+    live = set(AlertRule.objects.filter(pk__in=rules, is_active=True).values_list('pk', flat=True))
+    if len(live) < len(rules):
+        invalidate_alert_rules()
+        matches = [(rule, sample, value) for rule, sample, value in matches if rule.pk in live]
+        rules = {pk: rule for pk, rule in rules.items() if pk in live}
+        if not matches:
+            return 0
+    
+    wells = {well_key(sample.latitude, sample.longitude) for rule, sample, value in matches}
+    oldest = now - timedelta(hours=max(rule.dedup_window_hours for rule in rules.values()))
+    
+    open_alerts = {}
+    for alert in Alert.objects.filter(
+        rule_id__in=rules, well_key__in=wells, first_triggered_at__gte=oldest
+    ).order_by('first_triggered_at'):
+        if alert.first_triggered_at >= now - timedelta(hours=rules[alert.rule_id].dedup_window_hours):
+            open_alerts[(alert.rule_id, alert.well_key)] = alert
+    
+    created = {}
+    updated = {}
+    for rule, sample, value in matches:
+        key = (rule.pk, well_key(sample.latitude, sample.longitude))
+        alert = open_alerts.get(key) or created.get(key)
+        if alert is None:
+            created[key] = Alert(
+                rule=rule, sample_id=sample.sample_id, well_key=key[1], value=value,
+                first_triggered_at=now, last_triggered_at=now
+            )
+            continue
+        alert.occurrences += 1
+        alert.sample_id = sample.sample_id
+        alert.value = value
+        alert.last_triggered_at = now
+        if alert.pk:
+            updated[key] = alert
+    
+    Alert.objects.bulk_create(created.values())
+    Alert.objects.bulk_update(updated.values(), ['occurrences', 'sample_id', 'value', 'last_triggered_at'])
+    return len(matches)
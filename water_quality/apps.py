@@ -5,3 +5,7 @@ class WaterQualityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'water_quality'
     verbose_name = 'Water Quality Analysis'
+
+    def ready(self):
+        # Registers the signal handlers that invalidate the compiled alert rules
+        from . import alerts  # noqa: F401
@@ -0,0 +1,164 @@
+import json
+import zlib
+from collections import defaultdict
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import ExtractYear
+from .changes import record_changes, sample_payload
+from .indices import INDEX_FIELDS
+from .models import WaterQualitySample, SampleArchive, ArchivedSampleId
+from .utils import iter_batches
+
+# Stored values aggregated per archive chunk and reported by the statistics endpoint
+SUMMARY_FIELDS = INDEX_FIELDS + ['hi_adult', 'hi_child', 'cr_adult', 'cr_child']
+
+
+def compress_records(records):
+    return zlib.compress(json.dumps(records, cls=DjangoJSONEncoder).encode(), 6)
+
+
+def decompress_records(payload):
+    return json.loads(zlib.decompress(bytes(payload)))
+
+
+def summarize(records):
+    """Count, sum, min and max of every summary field, ignoring missing values"""
+    summary = {}
+    for field in SUMMARY_FIELDS:
+        values = [record[field] for record in records if record.get(field) is not None]
+        summary[field] = {
+            'count': len(values),
+            'sum': sum(values),
+            'min': min(values) if values else None,
+            'max': max(values) if values else None,
+        }
+    return summary
+
+
+def archive_samples(cutoff_date, chunk_size=5000, dry_run=False):
+    """
+    Move samples collected before `cutoff_date` from the hot table into
+    compressed SampleArchive chunks. Each chunk is written, logged to the
+    change feed as 'archive' and deleted from the hot table in one
+    transaction, so an interrupted run can simply be restarted.
+    Returns the number of samples archived.
+    """
+    queryset = WaterQualitySample.objects.filter(sampling_date__lt=cutoff_date)
+    if dry_run:
+        return queryset.count()
+    
+    archived = 0
+    while True:
+        with transaction.atomic():
+            # Locked so an update committed mid-chunk cannot be lost with the deleted row
+            batch = list(queryset.select_for_update().order_by('sampling_date', 'pk')[:chunk_size])
+            if not batch:
+                break
+            
+            by_year = defaultdict(list)
+            for sample in batch:
+                by_year[sample.sampling_date.year].append(sample)
+            
+            for year, samples in by_year.items():
+                records = [sample_payload(sample) for sample in samples]
+                archive = SampleArchive.objects.create(
+                    year=year,
+                    sample_count=len(samples),
+                    first_sampling_date=samples[0].sampling_date,
+                    last_sampling_date=samples[-1].sampling_date,
+                    payload=compress_records(records),
+                    summary=summarize(records),
+                )
+                ArchivedSampleId.objects.bulk_create([
+                    ArchivedSampleId(sample_id=sample.sample_id, archive=archive) for sample in samples
+                ])
+            
+            record_changes(batch, 'archive')
+            WaterQualitySample.objects.filter(pk__in=[sample.pk for sample in batch]).delete()
+        archived += len(batch)
+    return archived
+
+
+def vacuum_samples_table():
+    """Reclaim space and refresh planner statistics after archiving"""
+    table = connection.ops.quote_name(WaterQualitySample._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"VACUUM ANALYZE {table}")
+        elif connection.vendor == 'sqlite':
+            cursor.execute("VACUUM")
+
+
+def iter_archived_samples(year=None, chunk_size=100):
+    """Yield archived sample records (dicts), one chunk decompressed at a time"""
+    archives = SampleArchive.objects.all()
+    if year is not None:
+        archives = archives.filter(year=year)
+    
+    ids = archives.values_list('pk', flat=True).iterator(chunk_size=chunk_size)
+    for batch in iter_batches(ids, chunk_size):
+        # Load payloads a few at a time so only a bounded number are held in memory
+        for archive in SampleArchive.objects.filter(pk__in=batch).order_by('year', 'first_sampling_date', 'id'):
+            yield from decompress_records(archive.payload)
+
+
+def yearly_statistics():
+    """
+    Per-year sample counts and mean/min/max of the summary fields across the
+    hot table and the archive. Archived years are served from the stored
+    chunk summaries without decompressing any payload.
+    """
+    totals = defaultdict(lambda: {
+        'samples': 0,
+        'archived': 0,
+        'fields': {field: {'count': 0, 'sum': 0.0, 'min': None, 'max': None} for field in SUMMARY_FIELDS},
+    })
+    
+    def merge(year, field, count, total, minimum, maximum):
+        stats = totals[year]['fields'][field]
+        stats['count'] += count
+        stats['sum'] += total
+        if minimum is not None:
+            stats['min'] = minimum if stats['min'] is None else min(stats['min'], minimum)
+        if maximum is not None:
+            stats['max'] = maximum if stats['max'] is None else max(stats['max'], maximum)
+    
+    aggregates = {}
+    for field in SUMMARY_FIELDS:
+        aggregates[f'{field}_count'] = Count(field)
+        aggregates[f'{field}_avg'] = Avg(field)
+        aggregates[f'{field}_min'] = Min(field)
+        aggregates[f'{field}_max'] = Max(field)
+    hot_rows = (
+        WaterQualitySample.objects.order_by()
+        .annotate(year=ExtractYear('sampling_date'))
+        .values('year')
+        .annotate(samples=Count('pk'), **aggregates)
+    )
+    for row in hot_rows:
+        totals[row['year']]['samples'] += row['samples']
+        for field in SUMMARY_FIELDS:
+            count = row[f'{field}_count']
+            merge(row['year'], field, count, (row[f'{field}_avg'] or 0) * count,
+                  row[f'{field}_min'], row[f'{field}_max'])
+    
+    for year, sample_count, summary in SampleArchive.objects.values_list('year', 'sample_count', 'summary'):
+        totals[year]['samples'] += sample_count
+        totals[year]['archived'] += sample_count
+        for field in SUMMARY_FIELDS:
+            stats = summary.get(field)
+            if stats:
+                merge(year, field, stats['count'], stats['sum'], stats['min'], stats['max'])
+    
+    results = []
+    for year in sorted(totals):
+        entry = {'year': year, 'samples': totals[year]['samples'], 'archived': totals[year]['archived']}
+        for field, stats in totals[year]['fields'].items():
+            entry[field] = {
+                'mean': stats['sum'] / stats['count'] if stats['count'] else None,
+                'min': stats['min'],
+                'max': stats['max'],
+            }
+        results.append(entry)
+    return results
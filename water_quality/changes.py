@@ -0,0 +1,46 @@
+from django.db import connection
+from .models import SampleChange
+
+# pg_advisory_xact_lock key that serializes change log writers
+CHANGE_LOG_LOCK_ID = 0x5751_4348  # "WQCH"
+
+
+def _lock_change_log():
+    """
+    Serialize change log inserts until the surrounding transaction ends.
+
+    Sequence numbers are assigned at insert time but become visible at commit,
+    so two concurrent transactions could commit seq 11 before seq 10 and a
+    reader already past 11 would never see 10. Holding this lock until commit
+    makes seq order match commit order. SQLite already serializes writers.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [CHANGE_LOG_LOCK_ID])
+
+
+def sample_payload(sample):
+    """Snapshot of every stored field of a sample for the change log"""
+    return {field.attname: getattr(sample, field.attname) for field in sample._meta.concrete_fields}
+
+
+def latest_change_seq():
+    """Sequence number of the newest change, or 0 when the log is empty"""
+    return SampleChange.objects.order_by('-seq').values_list('seq', flat=True).first() or 0
+
+
+def record_change(sample, action):
+    """Append one change; call inside the transaction that modifies the sample"""
+    _lock_change_log()
+    return SampleChange.objects.create(
+        sample_id=sample.sample_id, action=action, payload=sample_payload(sample)
+    )
+
+
+def record_changes(samples, action):
+    """Append one change per sample with a single bulk insert"""
+    _lock_change_log()
+    return SampleChange.objects.bulk_create([
+        SampleChange(sample_id=sample.sample_id, action=action, payload=sample_payload(sample))
+        for sample in samples
+    ])
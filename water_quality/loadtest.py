@@ -0,0 +1,178 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .synthetic import generate_samples
+
+API_PREFIX = '/api/water-quality'
+
+# Default request mix (relative weights per endpoint)
+DEFAULT_MIX = {
+    'list': 40,
+    'detail': 20,
+    'indices': 15,
+    'create': 10,
+    'create_report': 5,
+    'pdf': 10,
+}
+
+
+def parse_mix(value):
+    """Parse 'list=40,detail=20,...' into a weight dict"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown endpoint '{name}', expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("At least one endpoint needs a positive weight")
+    return mix
+
+
+class LoadTest:
+    """
+    Replays a weighted mix of API requests against a running server with
+    `concurrency` worker threads, for `duration` seconds or until `requests`
+    requests have been sent, and records the latency of every request.
+    """
+    
+    def __init__(self, base_url, sample_ids, mix=None, concurrency=10, duration=30, requests=None,
+                 timeout=30, seed=None, page_count=1):
+        self.base_url = base_url.rstrip('/')
+        self.sample_ids = list(sample_ids)
+        self.mix = mix or DEFAULT_MIX
+        self.concurrency = concurrency
+        self.duration = duration
+        self.requests = requests
+        self.timeout = timeout
+        self.seed = seed
+        self.page_count = max(1, page_count)
+        self.results = []
+        self._lock = threading.Lock()
+        self._sent = 0
+    
+    def _build_request(self, name, rng):
+        if name == 'list':
+            return 'GET', f'{API_PREFIX}/samples/?page={rng.randint(1, self.page_count)}', None
+        if name in ('create', 'create_report'):
+            payload = generate_samples(1, seed=rng.getrandbits(32), prefix=f'LT-{uuid.uuid4().hex[:12]}-')[0]
+            path = f'{API_PREFIX}/samples/' if name == 'create' else f'{API_PREFIX}/create-and-report/'
+            return 'POST', path, json.dumps(payload).encode()
+        
+        sample_id = rng.choice(self.sample_ids)
+        suffix = {'detail': '', 'indices': 'indices/', 'pdf': 'pdf/'}[name]
+        return 'GET', f'{API_PREFIX}/samples/{sample_id}/{suffix}', None
+    
+    def _next_slot(self, deadline):
+        with self._lock:
+            if self.requests is not None and self._sent >= self.requests:
+                return False
+            if self.requests is None and time.monotonic() >= deadline:
+                return False
+            self._sent += 1
+            return True
+    
+    def _worker(self, worker, deadline):
+        rng = random.Random(None if self.seed is None else self.seed + worker)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        records = []
+        
+        while self._next_slot(deadline):
+            name = rng.choices(names, weights)[0]
+            method, path, body = self._build_request(name, rng)
+            request = urllib.request.Request(self.base_url + path, data=body, method=method)
+            if body is not None:
+                request.add_header('Content-Type', 'application/json')
+            
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                    ok = response.status < 400
+            except (urllib.error.URLError, OSError):
+                ok = False
+            records.append((name, time.perf_counter() - started, ok))
+        
+        with self._lock:
+            self.results.extend(records)
+    
+    def run(self):
+        """Run the load test and return the report from summarize()"""
+        started = time.monotonic()
+        deadline = started + self.duration
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(self._worker, worker, deadline) for worker in range(self.concurrency)]
+        for future in futures:
+            future.result()
+        return summarize(self.results, time.monotonic() - started)
+
+
+def _stats(latencies, errors, elapsed):
+    latencies_ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'error_rate': round(errors / len(latencies), 4),
+        'throughput': round(len(latencies) / elapsed, 2),
+        'p50': round(float(p50), 2),
+        'p95': round(float(p95), 2),
+        'p99': round(float(p99), 2),
+    }
+
+
+def summarize(results, elapsed):
+    """Per-endpoint and overall latency percentiles (ms), throughput (req/s) and error rate"""
+    report = {}
+    for name in sorted({name for name, latency, ok in results}):
+        rows = [(latency, ok) for endpoint, latency, ok in results if endpoint == name]
+        report[name] = _stats([latency for latency, ok in rows], sum(not ok for latency, ok in rows), elapsed)
+    if results:
+        report['overall'] = _stats(
+            [latency for name, latency, ok in results], sum(not ok for name, latency, ok in results), elapsed
+        )
+    return report
+
+
+def compare_to_baseline(report, baseline, tolerance=0.2, max_error_rate=0.01):
+    """
+    Check a report against a stored baseline. Latency percentiles may grow
+    and throughput may drop by at most `tolerance` (a fraction); the error
+    rate may not exceed max_error_rate or the baseline's, whichever is higher.
+    Returns a list of human readable regressions (empty when the check passes).
+    """
+    regressions = []
+    for name, expected in baseline.items():
+        actual = report.get(name)
+        if actual is None:
+            continue
+        for metric in ('p50', 'p95', 'p99'):
+            limit = expected[metric] * (1 + tolerance)
+            if actual[metric] > limit:
+                regressions.append(f"{name} {metric}: {actual[metric]:.1f} ms > {limit:.1f} ms")
+        minimum = expected['throughput'] * (1 - tolerance)
+        if actual['throughput'] < minimum:
+            regressions.append(f"{name} throughput: {actual['throughput']:.1f} < {minimum:.1f} req/s")
+        allowed_errors = max(max_error_rate, expected['error_rate'])
+        if actual['error_rate'] > allowed_errors:
+            regressions.append(f"{name} error rate: {actual['error_rate']:.2%} > {allowed_errors:.2%}")
+    return regressions
+
+
+def format_report(report):
+    header = f"{'endpoint':<14}{'requests':>9}{'errors':>8}{'err %':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    lines = [header, '-' * len(header)]
+    for name, stats in report.items():
+        lines.append(
+            f"{name:<14}{stats['requests']:>9}{stats['errors']:>8}{stats['error_rate']:>8.2%}"
+            f"{stats['throughput']:>9.1f}{stats['p50']:>9.1f}{stats['p95']:>9.1f}{stats['p99']:>9.1f}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,34 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from water_quality.archive import archive_samples, vacuum_samples_table
+
+
+class Command(BaseCommand):
+    help = "Move samples older than N years from the hot table into the compressed archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-years', type=int, required=True,
+                            help="Archive samples collected before January 1st, N years ago")
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help="Samples moved per transaction")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many samples would be archived")
+        parser.add_argument('--vacuum', action='store_true',
+                            help="Vacuum the samples table afterwards to reclaim space and refresh statistics")
+
+    def handle(self, *args, **options):
+        if options['older_than_years'] < 1:
+            raise CommandError("--older-than-years must be at least 1")
+
+        # Whole sampling years are archived so each archive chunk holds a single year
+        cutoff = date(date.today().year - options['older_than_years'], 1, 1)
+        count = archive_samples(cutoff, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(f"{count} samples collected before {cutoff} would be archived")
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {count} samples collected before {cutoff}"))
+        if options['vacuum'] and count:
+            vacuum_samples_table()
+            self.stdout.write("Vacuumed samples table")
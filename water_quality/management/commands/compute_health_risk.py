@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from water_quality.models import WaterQualitySample
+from water_quality.health_risk import update_health_risk
+
+
+class Command(BaseCommand):
+    help = "Compute and store USEPA health risk metrics for existing samples"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Samples computed and written per batch")
+        parser.add_argument('--missing-only', action='store_true',
+                            help="Only process samples without stored health risk values")
+
+    def handle(self, *args, **options):
+        queryset = WaterQualitySample.objects.all()
+        if options['missing_only']:
+            queryset = queryset.filter(hi_adult__isnull=True)
+
+        updated = update_health_risk(queryset, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Updated health risk for {updated} samples"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from water_quality.webhooks import WebhookDispatcher
+
+
+class Command(BaseCommand):
+    help = "Deliver change feed events to registered webhook endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Send one batch to every due endpoint and exit")
+        parser.add_argument('--interval', type=float, default=5,
+                            help="Seconds to sleep when there is nothing to deliver")
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help="Events per delivery")
+        parser.add_argument('--timeout', type=float, default=10,
+                            help="HTTP timeout per delivery in seconds")
+        parser.add_argument('--max-backoff', type=int, default=3600,
+                            help="Upper bound for the retry delay in seconds")
+
+    def handle(self, *args, **options):
+        dispatcher = WebhookDispatcher(
+            batch_size=options['batch_size'],
+            timeout=options['timeout'],
+            max_backoff=options['max_backoff'],
+        )
+        if options['once']:
+            delivered = dispatcher.dispatch_once()
+            self.stdout.write(self.style.SUCCESS(f"Delivered {delivered} events"))
+            return
+
+        self.stdout.write("Dispatching webhooks, press CTRL-C to stop")
+        try:
+            dispatcher.run(interval=options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,150 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from water_quality.loadtest import LoadTest, compare_to_baseline, format_report, parse_mix
+from water_quality.synthetic import seed_samples
+
+SEED_PREFIX = 'SYN'
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the app with gunicorn against a freshly seeded SQLite database, replay a mix of "
+        "API requests and report p50/p95/p99 latency, throughput and error rate per endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=2000,
+                            help="Synthetic samples seeded before the run")
+        parser.add_argument('--seed', type=int, default=42,
+                            help="Seed for the synthetic data and the request mix")
+        parser.add_argument('--concurrency', type=int, default=10,
+                            help="Concurrent client threads")
+        parser.add_argument('--duration', type=float, default=30,
+                            help="Seconds to run (ignored when --requests is given)")
+        parser.add_argument('--requests', type=int, default=None,
+                            help="Total number of requests to send")
+        parser.add_argument('--mix', default=None,
+                            help="Request weights, e.g. list=40,detail=20,indices=15,create=10,create_report=5,pdf=10")
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes")
+        parser.add_argument('--threads', type=int, default=4, help="gunicorn threads per worker")
+        parser.add_argument('--output', help="Write the report as JSON to this path")
+        parser.add_argument('--baseline', help="Compare against this baseline JSON report")
+        parser.add_argument('--save-baseline', action='store_true',
+                            help="Write this run's report to --baseline instead of comparing")
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help="Allowed relative latency increase / throughput drop vs the baseline")
+        parser.add_argument('--max-error-rate', type=float, default=0.01)
+        # Internal: schema creation and seeding, run in a subprocess against the load test database
+        parser.add_argument('--prepare', action='store_true', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['prepare']:
+            return self.prepare(options)
+
+        try:
+            mix = parse_mix(options['mix']) if options['mix'] else None
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError("--save-baseline requires --baseline")
+
+        workdir = Path(tempfile.mkdtemp(prefix='wq-loadtest-'))
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{workdir / 'loadtest.sqlite3'}",
+            ALLOWED_HOSTS='127.0.0.1,localhost',
+            # The production security settings redirect to HTTPS, which the local harness does not serve
+            DEBUG='True',
+        )
+        manage_py = str(Path(settings.BASE_DIR) / 'manage.py')
+        server = None
+        try:
+            self.stdout.write(f"Seeding {options['samples']} samples into {workdir}")
+            subprocess.run(
+                [sys.executable, manage_py, 'loadtest', '--prepare',
+                 '--samples', str(options['samples']), '--seed', str(options['seed'])],
+                env=env, check=True
+            )
+
+            base_url = f"http://127.0.0.1:{options['port']}"
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+                 '--bind', f"127.0.0.1:{options['port']}",
+                 '--workers', str(options['workers']), '--threads', str(options['threads']),
+                 '--log-level', 'warning'],
+                cwd=settings.BASE_DIR, env=env
+            )
+            self.wait_for_server(base_url, server)
+
+            self.stdout.write(f"Running load test against {base_url} with concurrency {options['concurrency']}")
+            load_test = LoadTest(
+                base_url,
+                sample_ids=[f'{SEED_PREFIX}{i:07d}' for i in range(options['samples'])],
+                mix=mix,
+                concurrency=options['concurrency'],
+                duration=options['duration'],
+                requests=options['requests'],
+                seed=options['seed'],
+                page_count=math.ceil(options['samples'] / settings.REST_FRAMEWORK['PAGE_SIZE']),
+            )
+            report = load_test.run()
+        except subprocess.CalledProcessError as e:
+            raise CommandError(f"Preparing the load test database failed: {e}")
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        if not report:
+            raise CommandError("No requests were sent")
+        self.stdout.write(format_report(report))
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+        if not options['baseline']:
+            return
+        if options['save_baseline']:
+            Path(options['baseline']).write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}"))
+            return
+
+        baseline = json.loads(Path(options['baseline']).read_text())
+        regressions = compare_to_baseline(report, baseline, options['tolerance'], options['max_error_rate'])
+        if regressions:
+            raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
+
+    def prepare(self, options):
+        # Build the schema straight from the models so the throwaway database
+        # does not depend on which migration files exist locally
+        with override_settings(MIGRATION_MODULES={'water_quality': None}):
+            call_command('migrate', run_syncdb=True, verbosity=0)
+        seed_samples(options['samples'], seed=options['seed'], prefix=SEED_PREFIX)
+
+    def wait_for_server(self, base_url, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited before the load test started")
+            try:
+                with urllib.request.urlopen(base_url + '/', timeout=2):
+                    return
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.2)
+        raise CommandError(f"Server did not start within {timeout} seconds")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from water_quality.synthetic import seed_samples
+
+
+class Command(BaseCommand):
+    help = "Insert synthetic water quality samples through the bulk import path"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=None,
+                            help="Random seed for reproducible data")
+        parser.add_argument('--prefix', default='SYN',
+                            help="Prefix of the generated sample IDs")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            created = seed_samples(options['count'], seed=options['seed'], prefix=options['prefix'],
+                                   batch_size=options['batch_size'])
+        except ValidationError as e:
+            raise CommandError(f"Generated samples failed validation: {e.detail}")
+        self.stdout.write(self.style.SUCCESS(f"Created {created} synthetic samples"))
+
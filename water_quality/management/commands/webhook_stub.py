@@ -0,0 +1,40 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Run a local HTTP receiver that prints webhook deliveries, for testing dispatch_webhooks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8099)
+        parser.add_argument('--status', type=int, default=200,
+                            help="HTTP status to answer with, e.g. 500 to exercise retries")
+
+    def handle(self, *args, **options):
+        stdout = self.stdout
+        response_status = options['status']
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                events = json.loads(body or b'{}').get('events', [])
+                seqs = [event['seq'] for event in events]
+                stdout.write(
+                    f"Received {len(events)} events (seq {min(seqs, default='-')}-{max(seqs, default='-')}), "
+                    f"signature={self.headers.get('X-Signature', 'none')}"
+                )
+                self.send_response(response_status)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), Handler)
+        self.stdout.write(f"Webhook stub listening on http://127.0.0.1:{options['port']}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -1,7 +1,11 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.urls import reverse
 import math
+from .validators import validate_webhook_url
+from .indices import METAL_FIELDS, INDEX_FIELDS, assign_indices
+from .health_risk import HEALTH_RISK_METALS, HEALTH_RISK_FIELDS, compute_health_risk, health_risk_values
 
 class WaterQualitySample(models.Model):
     sample_id = models.CharField(
@@ -78,12 +82,26 @@ class WaterQualitySample(models.Model):
     pi = models.FloatField(null=True, blank=True, help_text="Pollution Index")
     pli = models.FloatField(null=True, blank=True, help_text="Pollution Load Index")
     
+    # USEPA human health risk via drinking water ingestion (auto-calculated)
+    hi_adult = models.FloatField(null=True, blank=True, help_text="Hazard Index (adult)")
+    hi_child = models.FloatField(null=True, blank=True, help_text="Hazard Index (child)")
+    cr_adult = models.FloatField(null=True, blank=True, help_text="Total carcinogenic risk (adult)")
+    cr_child = models.FloatField(null=True, blank=True, help_text="Total carcinogenic risk (child)")
+    health_risk = models.JSONField(
+        null=True, blank=True,
+        help_text="Per-metal chronic daily intake, hazard quotient and cancer risk by receptor"
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-sampling_date', '-created_at']
+        indexes = [
+            # Serves the default ordering and sampling_date filters on large tables
+            models.Index(fields=['-sampling_date', '-created_at'], name='wq_sample_date_created_idx'),
+        ]
         verbose_name = "Water Quality Sample"
         verbose_name_plural = "Water Quality Samples"
     
@@ -95,104 +113,18 @@ class WaterQualitySample(models.Model):
     
     def calculate_indices(self):
         """Calculate all water quality indices based on WHO/EPA standards"""
-        # WHO/EPA standards for heavy metals (mg/L)
-        standards = {
-            'lead': 0.01,       # WHO guideline
-            'cadmium': 0.003,   # WHO guideline  
-            'chromium': 0.05,   # WHO guideline
-            'arsenic': 0.01,    # WHO guideline
-            'mercury': 0.006,   # WHO guideline
-            'nickel': 0.07,     # WHO guideline
-            'copper': 2.0,      # WHO guideline
-            'zinc': 3.0,        # WHO guideline (aesthetic)
-            'iron': 0.3,        # WHO guideline (aesthetic)
-            'manganese': 0.4,   # WHO guideline (aesthetic)
-            'cobalt': 0.05      # WHO/EPA estimate
-        }
-        
-        metals = {
-            'lead': self.lead,
-            'cadmium': self.cadmium,
-            'chromium': self.chromium,
-            'arsenic': self.arsenic,
-            'mercury': self.mercury,
-            'nickel': self.nickel,
-            'copper': self.copper,
-            'zinc': self.zinc,
-            'iron': self.iron,
-            'manganese': self.manganese,
-            'cobalt': self.cobalt
-        }
-        
-        # Heavy Metal Pollution Index (HMPI)
-        hmpi_sum = 0
-        for metal, value in metals.items():
-            if standards[metal] > 0:
-                hmpi_sum += (value / standards[metal]) * 100
-        self.hmpi = round(hmpi_sum / len(metals), 2)
-        
-        # Heavy Metal Evaluation Index (HEI)
-        hei_sum = sum(value / standards[metal] for metal, value in metals.items() if standards[metal] > 0)
-        self.hei = round(hei_sum, 2)
-        
-        # Heavy metal Contamination Index (HCI)
-        self.hci = round(sum(value / standards[metal] for metal, value in metals.items() if standards[metal] > 0), 2)
-        
-        # Contamination Degree (Cd)
-        self.cd = round(sum(value / standards[metal] for metal, value in metals.items() if standards[metal] > 0), 2)
-        
-        # Pollution Index (PI) - maximum contamination factor
-        pi_values = []
-        for metal, value in metals.items():
-            if standards[metal] > 0:
-                pi_values.append(value / standards[metal])
-        self.pi = round(max(pi_values) if pi_values else 0, 2)
-        
-        # Pollution Load Index (PLI) - geometric mean of contamination factors
-        pli_product = 1
-        valid_metals = 0
-        for metal, value in metals.items():
-            if standards[metal] > 0:
-                cf = value / standards[metal]
-                pli_product *= cf
-                valid_metals += 1
-        
-        if valid_metals > 0:
-            self.pli = round(pli_product ** (1/valid_metals), 2)
-        else:
-            self.pli = 0
-        
-        # Health Risk Index (HPI) - weighted approach
-        hpi_sum = 0
-        total_weight = 0
-        
-        # Weights based on health significance
-        weights = {
-            'arsenic': 0.5,   # Highly toxic
-            'lead': 0.4,      # Highly toxic
-            'cadmium': 0.4,   # Highly toxic
-            'mercury': 0.5,   # Highly toxic
-            'chromium': 0.3,  # Moderately toxic
-            'nickel': 0.2,    # Moderately toxic
-            'copper': 0.2,    # Less toxic (essential element)
-            'zinc': 0.1,      # Less toxic (essential element)
-            'iron': 0.1,      # Less toxic (essential element)
-            'manganese': 0.1, # Less toxic (essential element)
-            'cobalt': 0.2     # Moderately toxic
-        }
-        
-        for metal, value in metals.items():
-            weight = weights.get(metal, 0.1)
-            if standards[metal] > 0:
-                # Quality rating (Qi) = (Ci/Si) × 100
-                qi = (value / standards[metal]) * 100
-                hpi_sum += weight * qi
-                total_weight += weight
-        
-        self.hpi = round(hpi_sum / total_weight if total_weight > 0 else 0, 2)
+        # Same code path as bulk imports and recomputes, so results never differ
+        assign_indices([self])
+        self.save(update_fields=INDEX_FIELDS + HEALTH_RISK_FIELDS)
+    
+    def calculate_health_risk(self, save=True):
+        """Calculate USEPA hazard index and carcinogenic risk for adult and child receptors"""
+        results = compute_health_risk([[getattr(self, metal) for metal in HEALTH_RISK_METALS]])
+        for field, value in health_risk_values(results, 0).items():
+            setattr(self, field, value)
         
-        # Save the updated values
-        self.save(update_fields=['hmpi', 'hpi', 'hei', 'hci', 'cd', 'pi', 'pli'])
+        if save:
+            self.save(update_fields=HEALTH_RISK_FIELDS)
     
     def get_pollution_status(self):
         """Get overall pollution status based on calculated indices"""
@@ -215,3 +147,136 @@ class WaterQualitySample(models.Model):
             return "Moderate Pollution"
         else:
             return "Low Pollution"
+
+class SampleChange(models.Model):
+    """Append-only log of sample creates, updates and deletes, read through the change feed"""
+    ACTION_CHOICES = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+        ('archive', 'Archive'),
+    ]
+    
+    seq = models.BigAutoField(primary_key=True, help_text="Monotonic change sequence number")
+    sample_id = models.CharField(max_length=100, db_index=True)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    payload = models.JSONField(encoder=DjangoJSONEncoder, help_text="Sample state after the change")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['seq']
+        verbose_name = "Sample Change"
+        verbose_name_plural = "Sample Changes"
+    
+    def __str__(self):
+        return f"#{self.seq} {self.action} {self.sample_id}"
+
+class WebhookEndpoint(models.Model):
+    """Downstream receiver of change feed events, delivered by the dispatch_webhooks command"""
+    url = models.URLField(max_length=500, validators=[validate_webhook_url])
+    secret = models.CharField(
+        max_length=200, blank=True,
+        help_text="Shared secret used to sign deliveries (X-Signature header)"
+    )
+    is_active = models.BooleanField(default=True)
+    last_seq = models.BigIntegerField(default=0, help_text="Last change sequence delivered")
+    failure_count = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Webhook Endpoint"
+        verbose_name_plural = "Webhook Endpoints"
+    
+    def __str__(self):
+        return self.url
+
+class SampleArchive(models.Model):
+    """
+    Cold storage for old samples: a zlib-compressed JSON chunk of samples from
+    one sampling year, with per-index aggregates so statistics can be served
+    without decompressing the chunk.
+    """
+    year = models.PositiveIntegerField(db_index=True, help_text="Sampling year of every sample in the chunk")
+    sample_count = models.PositiveIntegerField()
+    first_sampling_date = models.DateField()
+    last_sampling_date = models.DateField()
+    payload = models.BinaryField(help_text="zlib-compressed JSON list of sample records")
+    summary = models.JSONField(help_text="Per-index count, sum, min and max")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['year', 'first_sampling_date', 'id']
+        verbose_name = "Sample Archive"
+        verbose_name_plural = "Sample Archives"
+    
+    def __str__(self):
+        return f"Archive {self.year} ({self.sample_count} samples)"
+
+class ArchivedSampleId(models.Model):
+    """Keeps archived sample IDs reserved once their rows leave the unique hot table"""
+    sample_id = models.CharField(max_length=100, unique=True)
+    archive = models.ForeignKey(SampleArchive, on_delete=models.CASCADE, related_name='sample_ids')
+    
+    class Meta:
+        verbose_name = "Archived Sample ID"
+        verbose_name_plural = "Archived Sample IDs"
+    
+    def __str__(self):
+        return self.sample_id
+
+class AlertRule(models.Model):
+    """Threshold on a metal concentration or index, evaluated whenever samples are written"""
+    OPERATOR_CHOICES = [
+        ('gt', '>'),
+        ('gte', '>='),
+        ('lt', '<'),
+        ('lte', '<='),
+    ]
+    FIELD_CHOICES = [(field, field) for field in METAL_FIELDS + INDEX_FIELDS]
+    
+    name = models.CharField(max_length=200)
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES, help_text="Metal (mg/L) or index to check")
+    operator = models.CharField(max_length=3, choices=OPERATOR_CHOICES, default='gt')
+    threshold = models.FloatField()
+    dedup_window_hours = models.PositiveIntegerField(
+        default=24,
+        help_text="Repeated matches for the same well within this window update the existing alert"
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Alert Rule"
+        verbose_name_plural = "Alert Rules"
+    
+    def __str__(self):
+        return f"{self.name} ({self.field} {self.get_operator_display()} {self.threshold})"
+
+
+class Alert(models.Model):
+    """A rule match for a well, deduplicated within the rule's time window"""
+    # Rules with alert history are deactivated rather than deleted
+    rule = models.ForeignKey(AlertRule, on_delete=models.PROTECT, related_name='alerts')
+    sample_id = models.CharField(max_length=100, help_text="Sample that last triggered the alert")
+    well_key = models.CharField(max_length=50, help_text="Well location as 'latitude,longitude'")
+    value = models.FloatField(help_text="Value that last triggered the alert")
+    occurrences = models.PositiveIntegerField(default=1)
+    first_triggered_at = models.DateTimeField()
+    last_triggered_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-last_triggered_at']
+        indexes = [
+            models.Index(fields=['rule', 'well_key', 'first_triggered_at'], name='wq_alert_dedup_idx'),
+        ]
+        verbose_name = "Alert"
+        verbose_name_plural = "Alerts"
+    
+    def __str__(self):
+        return f"{self.rule.name} at {self.well_key} ({self.sample_id})"
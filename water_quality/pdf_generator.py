@@ -6,6 +6,7 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from io import BytesIO
 import datetime
+from .health_risk import classify_hazard_index, classify_cancer_risk
 
 class WaterQualityPDFGenerator:
     def __init__(self):
@@ -26,7 +27,7 @@ class WaterQualityPDFGenerator:
             textColor=colors.darkblue
         )
     
-    def generate_report(self, sample_data):
+    def generate_report(self, sample_data, uncertainty=None):
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72,
                               topMargin=72, bottomMargin=18)
@@ -96,6 +97,14 @@ class WaterQualityPDFGenerator:
         story.append(indices_table)
         story.append(Spacer(1, 30))
         
+        # Health Risk Section
+        if sample_data.get('hi_adult') is not None:
+            story.extend(self._health_risk_section(sample_data))
+        
+        # Optional Uncertainty Section
+        if uncertainty:
+            story.extend(self._uncertainty_section(uncertainty))
+        
         # Interpretation Section
         interpretation_title = Paragraph("Index Interpretation Guidelines", self.heading_style)
         story.append(interpretation_title)
@@ -133,3 +142,70 @@ class WaterQualityPDFGenerator:
         doc.build(story)
         buffer.seek(0)
         return buffer
+    
+    def _health_risk_section(self, sample_data):
+        """USEPA hazard index and carcinogenic risk for adult and child receptors"""
+        health_risk_title = Paragraph("Human Health Risk (USEPA Ingestion)", self.heading_style)
+        
+        health_risk_data = [
+            ['Receptor', 'Hazard Index', 'Status', 'Cancer Risk', 'Status'],
+            ['Adult', f"{sample_data['hi_adult']:.3f}", classify_hazard_index(sample_data['hi_adult']),
+             f"{sample_data['cr_adult']:.2e}", classify_cancer_risk(sample_data['cr_adult'])],
+            ['Child', f"{sample_data['hi_child']:.3f}", classify_hazard_index(sample_data['hi_child']),
+             f"{sample_data['cr_child']:.2e}", classify_cancer_risk(sample_data['cr_child'])],
+        ]
+        
+        health_risk_table = Table(health_risk_data, colWidths=[0.8*inch, 1*inch, 1.6*inch, 1*inch, 1.2*inch])
+        health_risk_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        
+        note = Paragraph(
+            "Hazard index and carcinogenic risk for arsenic, cadmium, chromium and lead. "
+            "HI &gt; 1 indicates possible adverse effects; cancer risk above 1E-04 is unacceptable.",
+            self.styles['Normal']
+        )
+        return [health_risk_title, health_risk_table, Spacer(1, 10), note, Spacer(1, 30)]
+    
+    def _uncertainty_section(self, uncertainty):
+        """Confidence intervals from Monte Carlo uncertainty propagation"""
+        confidence = f"{uncertainty['confidence']:g}"
+        uncertainty_title = Paragraph(f"Index Uncertainty ({confidence}% Confidence Intervals)", self.heading_style)
+        
+        uncertainty_data = [['Index', 'Mean', 'Median', 'Lower', 'Upper']]
+        for name, label in (('hmpi', 'HMPI'), ('hpi', 'HPI'), ('pli', 'PLI')):
+            band = uncertainty['indices'][name]
+            uncertainty_data.append([
+                label, f"{band['mean']:.2f}", f"{band['median']:.2f}",
+                f"{band['lower']:.2f}", f"{band['upper']:.2f}"
+            ])
+        
+        uncertainty_table = Table(uncertainty_data, colWidths=[1.2*inch, 1*inch, 1*inch, 1*inch, 1*inch])
+        uncertainty_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        
+        note = Paragraph(
+            f"Based on {uncertainty['draws']} Monte Carlo draws of the measured concentrations "
+            "using the reported per-metal standard deviations.",
+            self.styles['Normal']
+        )
+        return [uncertainty_title, uncertainty_table, Spacer(1, 10), note, Spacer(1, 30)]
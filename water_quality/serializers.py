@@ -1,28 +1,100 @@
+from collections import Counter
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
-from .models import WaterQualitySample
+from rest_framework.validators import UniqueValidator
+from .models import WaterQualitySample, SampleChange, WebhookEndpoint, AlertRule, Alert, ArchivedSampleId
+from .indices import METAL_FIELDS, assign_indices
+from .changes import latest_change_seq, record_change, record_changes
+from .alerts import evaluate_alerts
+from .health_risk import classify_hazard_index, classify_cancer_risk
+from .utils import iter_batches
+
+# sample_ids per existence query during bulk import validation
+UNIQUE_CHECK_BATCH_SIZE = 2000
+
+class WaterQualitySampleListSerializer(serializers.ListSerializer):
+    """Bulk import: one INSERT for the samples and one for their change log entries"""
+    
+    def validate(self, attrs):
+        sample_ids = [item['sample_id'] for item in attrs]
+        duplicates = sorted(sample_id for sample_id, count in Counter(sample_ids).items() if count > 1)
+        if duplicates:
+            raise serializers.ValidationError(f"Duplicate sample_id values: {', '.join(duplicates)}")
+        
+        # Replaces the per-item UniqueValidator, which would run one query per sample
+        existing = []
+        archived = []
+        for batch in iter_batches(sample_ids, UNIQUE_CHECK_BATCH_SIZE):
+            existing.extend(
+                WaterQualitySample.objects.filter(sample_id__in=batch).values_list('sample_id', flat=True)
+            )
+            archived.extend(
+                ArchivedSampleId.objects.filter(sample_id__in=batch).values_list('sample_id', flat=True)
+            )
+        if existing:
+            raise serializers.ValidationError(f"Samples already exist: {', '.join(sorted(existing))}")
+        if archived:
+            raise serializers.ValidationError(f"Sample IDs belong to archived samples: {', '.join(sorted(archived))}")
+        return attrs
+    
+    def create(self, validated_data):
+        samples = [WaterQualitySample(**item) for item in validated_data]
+        assign_indices(samples)
+        with transaction.atomic():
+            samples = WaterQualitySample.objects.bulk_create(samples)
+            evaluate_alerts(samples)
+            record_changes(samples, 'create')
+        return samples
 
 class WaterQualitySampleSerializer(serializers.ModelSerializer):
     pollution_status = serializers.SerializerMethodField()
     
     class Meta:
         model = WaterQualitySample
-        fields = '__all__'
+        list_serializer_class = WaterQualitySampleListSerializer
+        # Per-metal health risk detail is served by samples/<id>/health-risk/
+        exclude = ['health_risk']
         read_only_fields = (
             'hmpi', 'hpi', 'hei', 'hci', 'cd', 'pi', 'pli', 
+            'hi_adult', 'hi_child', 'cr_adult', 'cr_child',
             'created_at', 'updated_at', 'pollution_status'
         )
     
+    def get_fields(self):
+        fields = super().get_fields()
+        if isinstance(self.parent, WaterQualitySampleListSerializer):
+            # Bulk imports check sample_id uniqueness with one query in the list serializer
+            fields['sample_id'].validators = [
+                validator for validator in fields['sample_id'].validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
+    
+    def validate_sample_id(self, value):
+        # Bulk imports check archived IDs with one query in the list serializer
+        if not isinstance(self.parent, WaterQualitySampleListSerializer):
+            if ArchivedSampleId.objects.filter(sample_id=value).exists():
+                raise serializers.ValidationError("This sample id belongs to an archived sample.")
+        return value
+    
     def get_pollution_status(self, obj):
         return obj.get_pollution_status()
     
     def create(self, validated_data):
-        sample = super().create(validated_data)
-        sample.calculate_indices()
+        with transaction.atomic():
+            sample = super().create(validated_data)
+            sample.calculate_indices()
+            evaluate_alerts([sample])
+            record_change(sample, 'create')
         return sample
     
     def update(self, instance, validated_data):
-        sample = super().update(instance, validated_data)
-        sample.calculate_indices()
+        with transaction.atomic():
+            sample = super().update(instance, validated_data)
+            sample.calculate_indices()
+            evaluate_alerts([sample])
+            record_change(sample, 'update')
         return sample
 
 class WaterQualityReportSerializer(serializers.ModelSerializer):
@@ -34,8 +106,112 @@ class WaterQualityReportSerializer(serializers.ModelSerializer):
             'sample_id', 'sampling_date', 'latitude', 'longitude', 'well_depth',
             'lead', 'cadmium', 'chromium', 'arsenic', 'mercury', 'nickel', 
             'copper', 'zinc', 'iron', 'manganese', 'cobalt',
-            'hmpi', 'hpi', 'hei', 'hci', 'cd', 'pi', 'pli', 'pollution_status'
+            'hmpi', 'hpi', 'hei', 'hci', 'cd', 'pi', 'pli', 'pollution_status',
+            'hi_adult', 'hi_child', 'cr_adult', 'cr_child'
         ]
     
     def get_pollution_status(self, obj):
         return obj.get_pollution_status()
+
+class HealthRiskSerializer(serializers.ModelSerializer):
+    hazard_status_adult = serializers.SerializerMethodField()
+    hazard_status_child = serializers.SerializerMethodField()
+    cancer_risk_status_adult = serializers.SerializerMethodField()
+    cancer_risk_status_child = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = WaterQualitySample
+        fields = [
+            'sample_id', 'arsenic', 'cadmium', 'chromium', 'lead',
+            'hi_adult', 'hi_child', 'cr_adult', 'cr_child', 'health_risk',
+            'hazard_status_adult', 'hazard_status_child',
+            'cancer_risk_status_adult', 'cancer_risk_status_child'
+        ]
+    
+    def get_hazard_status_adult(self, obj):
+        return classify_hazard_index(obj.hi_adult)
+    
+    def get_hazard_status_child(self, obj):
+        return classify_hazard_index(obj.hi_child)
+    
+    def get_cancer_risk_status_adult(self, obj):
+        return classify_cancer_risk(obj.cr_adult)
+    
+    def get_cancer_risk_status_child(self, obj):
+        return classify_cancer_risk(obj.cr_child)
+
+class UncertaintyRequestSerializer(serializers.Serializer):
+    std_devs = serializers.DictField(
+        child=serializers.FloatField(min_value=0), required=False,
+        help_text="Standard deviation per metal (mg/L)"
+    )
+    relative_std = serializers.FloatField(
+        min_value=0, required=False,
+        help_text="Relative standard deviation applied to metals without an explicit value"
+    )
+    draws = serializers.IntegerField(min_value=100, max_value=settings.UNCERTAINTY_MAX_DRAWS, default=10000)
+    seed = serializers.IntegerField(min_value=0, required=False, allow_null=True, default=None)
+    confidence = serializers.FloatField(min_value=50, max_value=99.9, default=95)
+    
+    def validate_std_devs(self, value):
+        unknown = set(value) - set(METAL_FIELDS)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown metals: {', '.join(sorted(unknown))}")
+        return value
+    
+    def validate(self, attrs):
+        if not attrs.get('std_devs') and not attrs.get('relative_std'):
+            raise serializers.ValidationError("Provide std_devs and/or relative_std")
+        return attrs
+
+class UncertaintyBatchRequestSerializer(UncertaintyRequestSerializer):
+    sample_ids = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False, max_length=settings.UNCERTAINTY_MAX_BATCH
+    )
+    
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        total = len(set(attrs['sample_ids'])) * attrs['draws']
+        if total > settings.UNCERTAINTY_MAX_TOTAL_DRAWS:
+            raise serializers.ValidationError(
+                f"sample_ids x draws must not exceed {settings.UNCERTAINTY_MAX_TOTAL_DRAWS} (got {total})"
+            )
+        return attrs
+
+class SampleChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SampleChange
+        fields = ['seq', 'sample_id', 'action', 'payload', 'created_at']
+
+class WebhookEndpointSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookEndpoint
+        fields = [
+            'id', 'url', 'secret', 'is_active', 'last_seq', 'failure_count',
+            'next_attempt_at', 'last_error', 'created_at'
+        ]
+        read_only_fields = ('last_seq', 'failure_count', 'next_attempt_at', 'last_error', 'created_at')
+        extra_kwargs = {'secret': {'write_only': True}}
+    
+    def create(self, validated_data):
+        # New endpoints receive changes from now on, not the whole history
+        validated_data['last_seq'] = latest_change_seq()
+        return super().create(validated_data)
+
+class AlertRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AlertRule
+        fields = '__all__'
+        read_only_fields = ('created_at', 'updated_at')
+
+class AlertSerializer(serializers.ModelSerializer):
+    rule_name = serializers.CharField(source='rule.name', read_only=True)
+    field = serializers.CharField(source='rule.field', read_only=True)
+    threshold = serializers.FloatField(source='rule.threshold', read_only=True)
+    
+    class Meta:
+        model = Alert
+        fields = [
+            'id', 'rule', 'rule_name', 'field', 'threshold', 'sample_id', 'well_key', 'value',
+            'occurrences', 'first_triggered_at', 'last_triggered_at'
+        ]
@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+import numpy as np
+from .indices import METAL_FIELDS, STANDARDS_ARRAY
+from .serializers import WaterQualitySampleSerializer
+from .utils import iter_batches
+
+# Typical measured concentration as a fraction of the WHO standard (log-normal median)
+TYPICAL_FRACTION = 0.4
+# Spread between wells and between samples of the same well (log-normal sigma)
+WELL_SIGMA = 0.9
+SAMPLE_SIGMA = 0.35
+
+
+def generate_samples(count, seed=None, wells=None, start_date=None, end_date=None, prefix='SYN'):
+    """
+    Realistic synthetic WaterQualitySample payloads for seeding and load testing.
+
+    Samples are spread over `wells` fixed locations (default: one well per ten
+    samples). Each well has its own log-normal contamination profile around
+    TYPICAL_FRACTION of the WHO standards, so some wells exceed the limits for
+    certain metals and repeated samples of a well are correlated. Returns a
+    list of dicts accepted by WaterQualitySampleSerializer.
+    """
+    rng = np.random.default_rng(seed)
+    wells = wells or max(1, count // 10)
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=5 * 365)
+    
+    well_latitude = rng.uniform(8, 35, wells)
+    well_longitude = rng.uniform(68, 97, wells)
+    well_depth = rng.gamma(4, 25, wells)
+    well_profile = rng.normal(np.log(TYPICAL_FRACTION), WELL_SIGMA, (wells, len(METAL_FIELDS)))
+    
+    well = rng.integers(0, wells, count)
+    noise = rng.normal(0, SAMPLE_SIGMA, (count, len(METAL_FIELDS)))
+    concentrations = np.exp(well_profile[well] + noise) * STANDARDS_ARRAY
+    offsets = rng.integers(0, (end_date - start_date).days + 1, count)
+    
+    samples = []
+    for i in range(count):
+        sample = {
+            'sample_id': f'{prefix}{i:07d}',
+            'sampling_date': (start_date + timedelta(days=int(offsets[i]))).isoformat(),
+            'latitude': round(float(well_latitude[well[i]]), 5),
+            'longitude': round(float(well_longitude[well[i]]), 5),
+            'well_depth': round(float(well_depth[well[i]]), 1),
+        }
+        for column, metal in enumerate(METAL_FIELDS):
+            sample[metal] = round(float(concentrations[i, column]), 5)
+        samples.append(sample)
+    return samples
+
+
+def seed_samples(count, seed=None, prefix='SYN', batch_size=1000):
+    """
+    Insert `count` synthetic samples through the serializer bulk path, so
+    indices, health risk, the change log and alerts are populated exactly as
+    for real imports. Returns the number of samples created.
+    """
+    created = 0
+    for batch in iter_batches(generate_samples(count, seed=seed, prefix=prefix), batch_size):
+        serializer = WaterQualitySampleSerializer(data=batch, many=True)
+        serializer.is_valid(raise_exception=True)
+        created += len(serializer.save())
+    return created
@@ -0,0 +1,155 @@
+from datetime import timedelta
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .alerts import CompiledRules, ALERT_FIELDS, evaluate_alerts, get_compiled_rules, invalidate_alert_rules
+from .models import WaterQualitySample, AlertRule, Alert
+
+
+def make_sample(sample_id, lead=0.05, latitude=28.6, longitude=77.2, **values):
+    """Unsaved sample; evaluate_alerts only reads its attributes"""
+    return WaterQualitySample(sample_id=sample_id, latitude=latitude, longitude=longitude, lead=lead, **values)
+
+
+class EvaluateAlertsTests(TestCase):
+
+    def setUp(self):
+        invalidate_alert_rules()
+        self.rule = AlertRule.objects.create(
+            name="Lead over WHO limit", field='lead', operator='gt', threshold=0.01, dedup_window_hours=24
+        )
+
+    def tearDown(self):
+        invalidate_alert_rules()
+
+    def test_match_creates_alert(self):
+        self.assertEqual(evaluate_alerts([make_sample('S1')]), 1)
+        alert = Alert.objects.get()
+        self.assertEqual(alert.rule, self.rule)
+        self.assertEqual(alert.sample_id, 'S1')
+        self.assertEqual(alert.well_key, '28.6000,77.2000')
+        self.assertEqual(alert.value, 0.05)
+        self.assertEqual(alert.occurrences, 1)
+
+    def test_no_match_below_threshold(self):
+        self.assertEqual(evaluate_alerts([make_sample('S1', lead=0.005)]), 0)
+        self.assertFalse(Alert.objects.exists())
+
+    def test_repeat_within_dedup_window_updates_alert(self):
+        evaluate_alerts([make_sample('S1')])
+        evaluate_alerts([make_sample('S2', lead=0.08)])
+        alert = Alert.objects.get()
+        self.assertEqual(alert.occurrences, 2)
+        self.assertEqual(alert.sample_id, 'S2')
+        self.assertEqual(alert.value, 0.08)
+        self.assertGreaterEqual(alert.last_triggered_at, alert.first_triggered_at)
+
+    def test_repeat_outside_dedup_window_opens_new_alert(self):
+        evaluate_alerts([make_sample('S1')])
+        Alert.objects.update(first_triggered_at=self.rule.created_at - timedelta(hours=25))
+        evaluate_alerts([make_sample('S2')])
+        self.assertEqual(Alert.objects.count(), 2)
+        self.assertEqual(sorted(Alert.objects.values_list('occurrences', flat=True)), [1, 1])
+
+    def test_dedup_window_is_per_rule(self):
+        short = AlertRule.objects.create(
+            name="Lead, short window", field='lead', operator='gt', threshold=0.01, dedup_window_hours=1
+        )
+        evaluate_alerts([make_sample('S1')])
+        Alert.objects.update(first_triggered_at=self.rule.created_at - timedelta(hours=2))
+        evaluate_alerts([make_sample('S2')])
+        self.assertEqual(Alert.objects.filter(rule=self.rule).count(), 1)
+        self.assertEqual(Alert.objects.get(rule=self.rule).occurrences, 2)
+        self.assertEqual(Alert.objects.filter(rule=short).count(), 2)
+
+    def test_same_well_in_one_batch_creates_one_alert(self):
+        samples = [make_sample('S1'), make_sample('S2', lead=0.02), make_sample('S3', lead=0.03)]
+        self.assertEqual(evaluate_alerts(samples), 3)
+        alert = Alert.objects.get()
+        self.assertEqual(alert.occurrences, 3)
+        self.assertEqual(alert.sample_id, 'S3')
+        self.assertEqual(alert.value, 0.03)
+
+    def test_batch_with_existing_alert_increments_it(self):
+        evaluate_alerts([make_sample('S1')])
+        evaluate_alerts([make_sample('S2'), make_sample('S3')])
+        self.assertEqual(Alert.objects.get().occurrences, 3)
+
+    def test_different_wells_in_one_batch_create_separate_alerts(self):
+        samples = [make_sample('S1'), make_sample('S2', latitude=28.7), make_sample('S3')]
+        evaluate_alerts(samples)
+        self.assertEqual(
+            dict(Alert.objects.values_list('well_key', 'occurrences')),
+            {'28.6000,77.2000': 2, '28.7000,77.2000': 1}
+        )
+
+    def test_deleted_rule_in_stale_cache_is_dropped(self):
+        get_compiled_rules()
+        AlertRule.objects.filter(pk=self.rule.pk).delete()
+        self.assertEqual(len(get_compiled_rules().rules), 1)
+        self.assertEqual(evaluate_alerts([make_sample('S1')]), 0)
+        self.assertFalse(Alert.objects.exists())
+
+    def test_inactive_rule_in_stale_cache_is_dropped(self):
+        other = AlertRule.objects.create(name="Any lead", field='lead', operator='gte', threshold=0)
+        get_compiled_rules()
+        AlertRule.objects.filter(pk=self.rule.pk).update(is_active=False)
+        self.assertEqual(evaluate_alerts([make_sample('S1')]), 1)
+        self.assertEqual(list(Alert.objects.values_list('rule', flat=True)), [other.pk])
+        # The stale cache was dropped, so the next evaluation only compiles active rules
+        self.assertEqual(get_compiled_rules().rules, [other])
+
+    def test_missing_values_never_match(self):
+        for operator in ('gt', 'gte', 'lt', 'lte'):
+            AlertRule.objects.create(name=f"hmpi {operator}", field='hmpi', operator=operator, threshold=100)
+        sample = make_sample('S1', lead=0.001)
+        self.assertIsNone(sample.hmpi)
+        self.assertEqual(evaluate_alerts([sample]), 0)
+        self.assertFalse(Alert.objects.exists())
+
+
+class CompiledRulesTests(TestCase):
+
+    def test_nan_never_matches(self):
+        rules = [
+            AlertRule(pk=pk, name=operator, field='arsenic', operator=operator, threshold=0.01)
+            for pk, operator in enumerate(('gt', 'gte', 'lt', 'lte'), start=1)
+        ]
+        values = np.full((2, len(ALERT_FIELDS)), np.nan)
+        values[1, ALERT_FIELDS.index('arsenic')] = 0.01
+        matches = CompiledRules(rules).evaluate(values)
+        self.assertEqual(matches[0].tolist(), [False, False, False, False])
+        self.assertEqual(matches[1].tolist(), [False, True, False, True])
+
+    def test_no_rules(self):
+        self.assertFalse(CompiledRules([]))
+
+
+class AlertRuleAPITests(TestCase):
+
+    def setUp(self):
+        invalidate_alert_rules()
+        self.client = APIClient()
+        self.rule = AlertRule.objects.create(name="Lead", field='lead', threshold=0.01)
+        self.url = f'/api/water-quality/alert-rules/{self.rule.pk}/'
+
+    def test_anonymous_cannot_change_rules(self):
+        response = self.client.post('/api/water-quality/alert-rules/', {
+            'name': "Arsenic", 'field': 'arsenic', 'operator': 'gt', 'threshold': 0.01
+        })
+        self.assertIn(response.status_code, (401, 403))
+        self.assertIn(self.client.delete(self.url).status_code, (401, 403))
+        self.assertTrue(AlertRule.objects.filter(pk=self.rule.pk).exists())
+
+    def test_rule_with_alerts_cannot_be_deleted(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        evaluate_alerts([make_sample('S1')])
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Alert.objects.filter(rule=self.rule).count(), 1)
+
+        response = self.client.patch(self.url, {'is_active': False}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AlertRule.objects.get(pk=self.rule.pk).is_active)
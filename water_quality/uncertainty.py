@@ -0,0 +1,112 @@
+import numpy as np
+from django.conf import settings
+from .indices import METAL_FIELDS, compute_indices
+
+UNCERTAINTY_INDICES = ['hmpi', 'hpi', 'pli']
+
+# float64 arrays alive per draw while a chunk is evaluated. Per metal: the
+# sampled concentrations, the contamination factors and log(cf) for PLI.
+# Per sample: the index arrays, PLI's log mean and the copies np.percentile
+# and the mean/std reductions make while summarizing.
+LIVE_METAL_ARRAYS = 3
+LIVE_INDEX_ARRAYS = 12
+
+
+def _confidence_percentiles(confidence):
+    tail = (100 - confidence) / 2
+    return [tail, 50, 100 - tail]
+
+
+def _summarize(samples, confidence):
+    """Reduce an index array of shape (n_samples, draws) to percentile bands"""
+    lower, median, upper = np.percentile(samples, _confidence_percentiles(confidence), axis=-1)
+    mean = samples.mean(axis=-1)
+    std = samples.std(axis=-1)
+    return [
+        {
+            'mean': round(float(mean[i]), 2),
+            'std': round(float(std[i]), 2),
+            'lower': round(float(lower[i]), 2),
+            'median': round(float(median[i]), 2),
+            'upper': round(float(upper[i]), 2),
+        }
+        for i in range(samples.shape[0])
+    ]
+
+
+def _draw(rng, means, std_devs, draws):
+    """
+    Draw `draws` concentration vectors per sample from independent normal
+    distributions, truncated at zero since concentrations cannot be negative.
+    Returns an array of shape (n_samples, draws, n_metals).
+    """
+    noise = rng.standard_normal((means.shape[0], draws, means.shape[1]))
+    noise *= std_devs[:, np.newaxis, :]
+    noise += means[:, np.newaxis, :]
+    np.maximum(noise, 0, out=noise)
+    return noise
+
+
+def _as_matrix(rows):
+    """Turn a list of {metal: value} dicts into an (n_samples, n_metals) array"""
+    return np.array(
+        [[float(row.get(metal) or 0) for metal in METAL_FIELDS] for row in rows],
+        dtype=float
+    ).reshape(len(rows), len(METAL_FIELDS))
+
+
+def chunk_size_for(draws, memory_budget=None):
+    """Number of samples that can be simulated together within the memory budget"""
+    if memory_budget is None:
+        memory_budget = settings.UNCERTAINTY_MEMORY_BUDGET
+    per_sample = draws * 8 * (LIVE_METAL_ARRAYS * len(METAL_FIELDS) + LIVE_INDEX_ARRAYS)
+    return max(1, memory_budget // per_sample)
+
+
+def propagate_uncertainty_batch(concentrations, std_devs, draws=10000, seed=None,
+                                confidence=95, memory_budget=None):
+    """
+    Monte Carlo propagation of measurement uncertainty for many samples.
+
+    `concentrations` and `std_devs` are lists of {metal: value} dicts, one per
+    sample. Samples are simulated in chunks sized so that the draws for a chunk
+    stay within `memory_budget` bytes. A single seeded generator is shared by
+    all chunks so results are reproducible for a given seed and input order.
+    """
+    means = _as_matrix(concentrations)
+    sigmas = _as_matrix(std_devs)
+    rng = np.random.default_rng(seed)
+    chunk = chunk_size_for(draws, memory_budget)
+
+    results = []
+    for start in range(0, means.shape[0], chunk):
+        simulated = _draw(rng, means[start:start + chunk], sigmas[start:start + chunk], draws)
+        indices = compute_indices(simulated)
+        bands = {name: _summarize(indices[name], confidence) for name in UNCERTAINTY_INDICES}
+        for i in range(simulated.shape[0]):
+            results.append({name: bands[name][i] for name in UNCERTAINTY_INDICES})
+    return results
+
+
+def propagate_uncertainty(concentrations, std_devs, draws=10000, seed=None, confidence=95):
+    """Monte Carlo percentile bands for HMPI, HPI and PLI of a single sample"""
+    return propagate_uncertainty_batch(
+        [concentrations], [std_devs], draws=draws, seed=seed, confidence=confidence
+    )[0]
+
+
+def resolve_std_devs(concentrations, std_devs=None, relative_std=None):
+    """
+    Per-metal standard deviations for a sample. Explicit values win; metals
+    without one fall back to `relative_std` times the measured concentration.
+    """
+    std_devs = std_devs or {}
+    resolved = {}
+    for metal in METAL_FIELDS:
+        if std_devs.get(metal) is not None:
+            resolved[metal] = std_devs[metal]
+        elif relative_std:
+            resolved[metal] = relative_std * concentrations[metal]
+        else:
+            resolved[metal] = 0
+    return resolved
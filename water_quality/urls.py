@@ -6,5 +6,16 @@ urlpatterns = [
     path('samples/<str:sample_id>/', views.WaterQualitySampleDetailView.as_view(), name='sample-detail'),
     path('samples/<str:sample_id>/pdf/', views.generate_pdf_report, name='generate-pdf'),
     path('samples/<str:sample_id>/indices/', views.get_sample_indices, name='sample-indices'),
+    path('samples/<str:sample_id>/health-risk/', views.get_sample_health_risk, name='sample-health-risk'),
+    path('samples/<str:sample_id>/uncertainty/', views.get_sample_uncertainty, name='sample-uncertainty'),
+    path('uncertainty/', views.get_batch_uncertainty, name='batch-uncertainty'),
+    path('bulk-import/', views.bulk_import_samples, name='bulk-import'),
+    path('changes/', views.get_changes, name='changes'),
+    path('webhooks/', views.WebhookEndpointListCreateView.as_view(), name='webhook-list-create'),
+    path('alert-rules/', views.AlertRuleListCreateView.as_view(), name='alert-rule-list-create'),
+    path('alert-rules/<int:pk>/', views.AlertRuleDetailView.as_view(), name='alert-rule-detail'),
+    path('alerts/', views.AlertListView.as_view(), name='alert-list'),
+    path('export/', views.export_samples, name='export'),
+    path('statistics/', views.get_statistics, name='statistics'),
     path('create-and-report/', views.create_sample_and_generate_report, name='create-and-report'),
 ]
@@ -0,0 +1,11 @@
+from itertools import islice
+
+
+def iter_batches(iterable, batch_size):
+    """Yield lists of up to `batch_size` items from `iterable`"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
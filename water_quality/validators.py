@@ -0,0 +1,28 @@
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+
+def validate_webhook_url(url):
+    """
+    Webhook targets must be http(s) URLs whose host resolves only to public
+    addresses, so deliveries cannot be pointed at internal services.
+    WEBHOOK_ALLOW_PRIVATE_TARGETS lifts the address check for local testing.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValidationError("Webhook URL must be an http or https URL")
+    if settings.WEBHOOK_ALLOW_PRIVATE_TARGETS:
+        return
+    
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, parts.port or None)}
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise ValidationError(f"Cannot resolve webhook host '{parts.hostname}'")
+    
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if not ip.is_global:
+            raise ValidationError(f"Webhook host '{parts.hostname}' resolves to non-public address {ip}")
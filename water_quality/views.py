@@ -1,31 +1,160 @@
-from rest_framework import generics, status
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import ProtectedError
+import csv
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import WaterQualitySample
-from .serializers import WaterQualitySampleSerializer, WaterQualityReportSerializer
+from .models import WaterQualitySample, SampleChange, WebhookEndpoint, AlertRule, Alert
+from .serializers import (
+    WaterQualitySampleSerializer, WaterQualityReportSerializer,
+    UncertaintyRequestSerializer, UncertaintyBatchRequestSerializer, HealthRiskSerializer,
+    SampleChangeSerializer, WebhookEndpointSerializer, AlertRuleSerializer, AlertSerializer
+)
+from .changes import record_change
+from .archive import iter_archived_samples, yearly_statistics
 from .pdf_generator import WaterQualityPDFGenerator
+from .indices import METAL_FIELDS, INDEX_FIELDS
+from .uncertainty import propagate_uncertainty_batch, resolve_std_devs
+
+# Stored values that can be range-filtered with ?<field>_min= / ?<field>_max=
+RANGE_FILTER_FIELDS = INDEX_FIELDS + ['hi_adult', 'hi_child', 'cr_adult', 'cr_child']
 
 class WaterQualitySampleListCreateView(generics.ListCreateAPIView):
     queryset = WaterQualitySample.objects.all()
     serializer_class = WaterQualitySampleSerializer
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        filters = {}
+        for field in RANGE_FILTER_FIELDS:
+            for suffix, lookup in (('min', 'gte'), ('max', 'lte')):
+                param = f'{field}_{suffix}'
+                if param not in self.request.query_params:
+                    continue
+                try:
+                    filters[f'{field}__{lookup}'] = float(self.request.query_params[param])
+                except ValueError:
+                    raise serializers.ValidationError({param: 'A valid number is required.'})
+        return queryset.filter(**filters)
 
 class WaterQualitySampleDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = WaterQualitySample.objects.all()
     serializer_class = WaterQualitySampleSerializer
     lookup_field = 'sample_id'
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_change(instance, 'delete')
+            instance.delete()
+
+class WebhookEndpointListCreateView(generics.ListCreateAPIView):
+    queryset = WebhookEndpoint.objects.all()
+    serializer_class = WebhookEndpointSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+class AlertRuleListCreateView(generics.ListCreateAPIView):
+    queryset = AlertRule.objects.all()
+    serializer_class = AlertRuleSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+class AlertRuleDetailView(generics.RetrieveUpdateDestroyAPIView):
+    queryset = AlertRule.objects.all()
+    serializer_class = AlertRuleSerializer
+    permission_classes = [permissions.IsAdminUser]
+    
+    def perform_destroy(self, instance):
+        try:
+            instance.delete()
+        except ProtectedError:
+            raise serializers.ValidationError(
+                "This rule has alerts; deactivate it with is_active=false instead of deleting it."
+            )
+
+class AlertListView(generics.ListAPIView):
+    serializer_class = AlertSerializer
+    
+    def get_queryset(self):
+        queryset = Alert.objects.select_related('rule')
+        params = self.request.query_params
+        if 'rule' in params:
+            try:
+                queryset = queryset.filter(rule_id=int(params['rule']))
+            except ValueError:
+                raise serializers.ValidationError({'rule': 'A valid integer is required.'})
+        if 'sample_id' in params:
+            queryset = queryset.filter(sample_id=params['sample_id'])
+        if 'well_key' in params:
+            queryset = queryset.filter(well_key=params['well_key'])
+        return queryset
+
+# Columns of the CSV export
+EXPORT_FIELDS = (
+    ['sample_id', 'sampling_date', 'latitude', 'longitude', 'well_depth']
+    + METAL_FIELDS + INDEX_FIELDS + ['hi_adult', 'hi_child', 'cr_adult', 'cr_child']
+)
+
+# Maximum number of changes returned per change feed page
+CHANGE_FEED_MAX_LIMIT = 1000
+
+def _run_uncertainty(samples, options):
+    """Propagate measurement uncertainty for the given samples in one vectorized batch"""
+    concentrations = [{metal: getattr(sample, metal) for metal in METAL_FIELDS} for sample in samples]
+    std_devs = [
+        resolve_std_devs(values, options.get('std_devs'), options.get('relative_std'))
+        for values in concentrations
+    ]
+    bands = propagate_uncertainty_batch(
+        concentrations, std_devs,
+        draws=options['draws'], seed=options['seed'], confidence=options['confidence']
+    )
+    return [
+        {'sample_id': sample.sample_id, 'std_devs': sample_std, 'indices': sample_bands}
+        for sample, sample_std, sample_bands in zip(samples, std_devs, bands)
+    ]
+
+def _uncertainty_options_from_query(query_params):
+    """Build uncertainty request data from PDF query parameters (sd_<metal>=value)"""
+    data = {
+        key: query_params[key]
+        for key in ('relative_std', 'draws', 'seed', 'confidence')
+        if key in query_params
+    }
+    std_devs = {
+        metal: query_params[f'sd_{metal}']
+        for metal in METAL_FIELDS
+        if f'sd_{metal}' in query_params
+    }
+    if std_devs:
+        data['std_devs'] = std_devs
+    return data
 
 @api_view(['GET'])
 def generate_pdf_report(request, sample_id):
-    """Generate PDF report for a specific water quality sample"""
+    """
+    Generate PDF report for a specific water quality sample.
+    
+    Pass ?uncertainty=true together with relative_std and/or sd_<metal>
+    parameters to include Monte Carlo confidence intervals in the report.
+    """
     try:
         sample = get_object_or_404(WaterQualitySample, sample_id=sample_id)
+        
+        uncertainty = None
+        if request.query_params.get('uncertainty', '').lower() in ('1', 'true', 'yes'):
+            options = UncertaintyRequestSerializer(data=_uncertainty_options_from_query(request.query_params))
+            if not options.is_valid():
+                return Response(options.errors, status=status.HTTP_400_BAD_REQUEST)
+            uncertainty = _run_uncertainty([sample], options.validated_data)[0]
+            uncertainty['draws'] = options.validated_data['draws']
+            uncertainty['confidence'] = options.validated_data['confidence']
+        
         serializer = WaterQualityReportSerializer(sample)
         
         # Generate PDF
         pdf_generator = WaterQualityPDFGenerator()
-        pdf_buffer = pdf_generator.generate_report(serializer.data)
+        pdf_buffer = pdf_generator.generate_report(serializer.data, uncertainty=uncertainty)
         
         # Create HTTP response
         response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
@@ -73,3 +202,131 @@ def get_sample_indices(request, sample_id):
     sample = get_object_or_404(WaterQualitySample, sample_id=sample_id)
     serializer = WaterQualityReportSerializer(sample)
     return Response(serializer.data)
+
+@api_view(['POST'])
+def bulk_import_samples(request):
+    """Create many samples in one transaction from a JSON list"""
+    if not isinstance(request.data, list):
+        return Response({'error': 'Expected a list of samples'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = WaterQualitySampleSerializer(data=request.data, many=True)
+    if serializer.is_valid():
+        samples = serializer.save()
+        return Response(
+            {'created': len(samples), 'sample_ids': [sample.sample_id for sample in samples]},
+            status=status.HTTP_201_CREATED
+        )
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+def get_changes(request):
+    """
+    Cursor-based change feed. Returns changes with seq greater than ?since=,
+    oldest first; pass next_since back as ?since= to continue.
+    """
+    try:
+        since = int(request.query_params.get('since', 0))
+        limit = min(int(request.query_params.get('limit', 100)), CHANGE_FEED_MAX_LIMIT)
+    except ValueError:
+        return Response({'error': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    if limit < 1:
+        return Response({'error': 'limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Fetch one extra row to know whether another page follows
+    changes = list(SampleChange.objects.filter(seq__gt=since).order_by('seq')[:limit + 1])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    return Response({
+        'results': SampleChangeSerializer(changes, many=True).data,
+        'next_since': changes[-1].seq if changes else since,
+        'has_more': has_more,
+    })
+
+@api_view(['GET'])
+def get_sample_health_risk(request, sample_id):
+    """Get stored USEPA hazard index and carcinogenic risk for a specific sample"""
+    sample = get_object_or_404(WaterQualitySample, sample_id=sample_id)
+    serializer = HealthRiskSerializer(sample)
+    return Response(serializer.data)
+
+@api_view(['POST'])
+def get_sample_uncertainty(request, sample_id):
+    """Monte Carlo confidence intervals for HMPI, HPI and PLI of a sample"""
+    sample = get_object_or_404(WaterQualitySample, sample_id=sample_id)
+    options = UncertaintyRequestSerializer(data=request.data)
+    if not options.is_valid():
+        return Response(options.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    result = _run_uncertainty([sample], options.validated_data)[0]
+    result.update({
+        'draws': options.validated_data['draws'],
+        'seed': options.validated_data['seed'],
+        'confidence': options.validated_data['confidence'],
+    })
+    return Response(result)
+
+@api_view(['POST'])
+def get_batch_uncertainty(request):
+    """Monte Carlo confidence intervals for several samples with shared uncertainty settings"""
+    options = UncertaintyBatchRequestSerializer(data=request.data)
+    if not options.is_valid():
+        return Response(options.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    sample_ids = options.validated_data['sample_ids']
+    found = WaterQualitySample.objects.in_bulk(sample_ids, field_name='sample_id')
+    samples = [found[sample_id] for sample_id in dict.fromkeys(sample_ids) if sample_id in found]
+    
+    return Response({
+        'draws': options.validated_data['draws'],
+        'seed': options.validated_data['seed'],
+        'confidence': options.validated_data['confidence'],
+        'results': _run_uncertainty(samples, options.validated_data),
+        'missing': [sample_id for sample_id in dict.fromkeys(sample_ids) if sample_id not in found],
+    })
+
+class _Echo:
+    """File-like object that hands each CSV row straight back to the streaming response"""
+    def write(self, value):
+        return value
+
+def _export_rows(year, include_archived):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS + ['archived'])
+    
+    queryset = WaterQualitySample.objects.order_by('sampling_date', 'pk')
+    if year is not None:
+        queryset = queryset.filter(sampling_date__year=year)
+    for row in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=2000):
+        yield writer.writerow(list(row) + [False])
+    
+    if include_archived:
+        for record in iter_archived_samples(year=year):
+            yield writer.writerow([record.get(field) for field in EXPORT_FIELDS] + [True])
+
+@api_view(['GET'])
+def export_samples(request):
+    """
+    Stream all samples as CSV, including archived samples unless
+    ?include_archived=false. Use ?year= to export a single sampling year.
+    """
+    try:
+        year = int(request.query_params['year']) if 'year' in request.query_params else None
+    except ValueError:
+        return Response({'error': 'year must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    include_archived = request.query_params.get('include_archived', 'true').lower() not in ('0', 'false', 'no')
+    
+    response = StreamingHttpResponse(_export_rows(year, include_archived), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="water_quality_samples.csv"'
+    return response
+
+@api_view(['GET'])
+def get_statistics(request):
+    """Per-year sample counts and index statistics across live and archived samples"""
+    years = yearly_statistics()
+    return Response({
+        'total_samples': sum(entry['samples'] for entry in years),
+        'archived_samples': sum(entry['archived'] for entry in years),
+        'years': years,
+    })
@@ -0,0 +1,109 @@
+import hashlib
+import hmac
+import json
+import logging
+import time
+import urllib.request
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from .models import SampleChange, WebhookEndpoint
+from .serializers import SampleChangeSerializer
+from .validators import validate_webhook_url
+
+logger = logging.getLogger(__name__)
+
+
+def sign_payload(secret, body):
+    """HMAC-SHA256 signature sent as the X-Signature header"""
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class _NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Treat redirects as failed deliveries so a target cannot bounce events to another host"""
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class WebhookDispatcher:
+    """
+    Pushes change feed events to registered webhook endpoints.
+
+    Each endpoint keeps its own cursor (last_seq). Events are sent in batches
+    in sequence order; the cursor only advances after a 2xx response, so a
+    failed batch is retried with exponential backoff and delivery is
+    at-least-once.
+    """
+    
+    def __init__(self, batch_size=100, timeout=10, base_backoff=5, max_backoff=3600, opener=None):
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.opener = opener or urllib.request.build_opener(_NoRedirectHandler).open
+    
+    def due_endpoints(self):
+        now = timezone.now()
+        return WebhookEndpoint.objects.filter(is_active=True).filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+        )
+    
+    def dispatch_once(self):
+        """Send at most one batch to every due endpoint; returns the number of events delivered"""
+        delivered = 0
+        for endpoint in self.due_endpoints():
+            delivered += self.deliver(endpoint)
+        return delivered
+    
+    def deliver(self, endpoint):
+        changes = list(SampleChange.objects.filter(seq__gt=endpoint.last_seq).order_by('seq')[:self.batch_size])
+        if not changes:
+            return 0
+        
+        # Re-resolve on every delivery so a DNS change cannot redirect events to an internal host
+        try:
+            validate_webhook_url(endpoint.url)
+        except ValidationError as e:
+            self._record_failure(endpoint, e.messages[0])
+            return 0
+        
+        body = json.dumps(
+            {'events': SampleChangeSerializer(changes, many=True).data},
+            cls=DjangoJSONEncoder
+        ).encode()
+        request = urllib.request.Request(endpoint.url, data=body, method='POST')
+        request.add_header('Content-Type', 'application/json')
+        if endpoint.secret:
+            request.add_header('X-Signature', sign_payload(endpoint.secret, body))
+        
+        try:
+            with self.opener(request, timeout=self.timeout) as response:
+                if not 200 <= response.status < 300:
+                    raise ValueError(f"HTTP {response.status}")
+        except Exception as e:
+            self._record_failure(endpoint, e)
+            return 0
+        
+        endpoint.last_seq = changes[-1].seq
+        endpoint.failure_count = 0
+        endpoint.next_attempt_at = None
+        endpoint.last_error = ''
+        endpoint.save(update_fields=['last_seq', 'failure_count', 'next_attempt_at', 'last_error', 'updated_at'])
+        return len(changes)
+    
+    def _record_failure(self, endpoint, error):
+        endpoint.failure_count += 1
+        delay = min(self.base_backoff * 2 ** (endpoint.failure_count - 1), self.max_backoff)
+        endpoint.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        endpoint.last_error = str(error)[:1000]
+        endpoint.save(update_fields=['failure_count', 'next_attempt_at', 'last_error', 'updated_at'])
+        logger.warning("Webhook delivery to %s failed (attempt %s, retry in %ss): %s",
+                       endpoint.url, endpoint.failure_count, delay, error)
+    
+    def run(self, interval=5):
+        """Dispatch forever, sleeping `interval` seconds whenever there is nothing to send"""
+        while True:
+            if not self.dispatch_once():
+                time.sleep(interval)